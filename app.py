@@ -2,7 +2,7 @@ import streamlit as st
 #import numpy as np
 from statistics import median
 from core.news import buscar_noticias_combinadas
-from core.dados import carregar_ativos, extrair_palavras_chave, carregar_keywords, carregar_keywords_setoriais
+from core.dados import carregar_ativos, filtrar_noticias_relevantes, carregar_keywords, carregar_keywords_setoriais
 from core.analise import analisar_sentimento_em_lote, analisar_tendencia
 from core.grafico import (
     carregar_dados_preco,
@@ -94,14 +94,8 @@ if "analise_ativa" in st.session_state and st.session_state.analise_ativa and st
     st.subheader(f"🔍 Análise de Notícias sobre {termo_busca}")
     noticias = buscar_noticias_combinadas(termo_busca)
 
-    if ativo:
-        palavras_chave = [p.lower() for p in extrair_palavras_chave(ativo)]
-    else:
-        palavras_chave = []
-
-        # A linha de filtragem usa a lista de palavras-chave gerada
-    noticias_relevantes = [n for n in noticias if
-                           any(p in f"{n['titulo']} {n['resumo']}".lower() for p in palavras_chave)]
+    # A filtragem usa a lista de palavras-chave gerada a partir do ativo
+    noticias_relevantes = filtrar_noticias_relevantes(noticias, ativo)
 
     tendencia = analisar_tendencia(dados)
     st.subheader("📊 Análise de Tendência")
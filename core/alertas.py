@@ -0,0 +1,290 @@
+import bisect, json, logging
+import os
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import pandas as pd
+from logging.handlers import RotatingFileHandler
+from core.dados import normalizar_ticker
+
+
+#config do logging para salvar erros no arquivo .log
+os.makedirs("logs", exist_ok=True)
+
+# Configura rotação: 1 MB por arquivo, até 5 arquivos antigos
+handler = RotatingFileHandler("logs/bugs.log", maxBytes=1_000_000, backupCount=5)
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        handler,
+        logging.StreamHandler()
+    ]
+)
+
+# 🔹 Tipos de condição aceitos nas regras e de qual evento cada um depende
+CONDICOES_PRECO = {"cruzamento_media", "variacao"}
+CONDICOES_NOTICIA = {"sentimento_diario", "rajada_negativa"}
+TODOS = "*"
+# Mesmo corte usado no app para classificar uma notícia como negativa
+LIMIAR_NEGATIVO = -0.1
+
+
+# 🔹 Regra de alerta: todas as condições precisam valer no mesmo dia para disparar
+@dataclass
+class Regra:
+    """
+    Condições (dicts) suportadas:
+      {"tipo": "cruzamento_media", "janela": 20, "direcao": "alta" | "baixa"}
+      {"tipo": "variacao", "percentual": -5}            # fechamento vs. candle anterior; negativo == queda
+      {"tipo": "sentimento_diario", "abaixo_de": -0.3, "minimo_noticias": 1}
+      {"tipo": "rajada_negativa", "quantidade": 3, "horas": 6}
+    ticker == "*" aplica a regra a todos os ativos; "PETR4" é normalizado para "PETR4.SA".
+    """
+    id: str
+    ticker: str
+    condicoes: list
+    descricao: str = ""
+    tipos: set = field(init=False)
+
+    def __post_init__(self):
+        # Mesmo formato dos tickers do DB e da CLI ("PETR4" -> "PETR4.SA"), senão a regra nunca casa
+        if self.ticker != TODOS:
+            self.ticker = normalizar_ticker(self.ticker)
+        self.tipos = {c["tipo"] for c in self.condicoes}
+        desconhecidos = self.tipos - CONDICOES_PRECO - CONDICOES_NOTICIA
+        if desconhecidos:
+            raise ValueError(f"Condição desconhecida na regra {self.id}: {', '.join(sorted(desconhecidos))}")
+
+    @property
+    def janelas(self):
+        return {c.get("janela", 20) for c in self.condicoes if c["tipo"] == "cruzamento_media"}
+
+
+# 🔹 Estado incremental de um ativo: somas móveis por janela, último cruzamento, sentimento do dia e notícias negativas recentes
+class _EstadoAtivo:
+    def __init__(self, janelas):
+        self.janelas = set(janelas)
+        self.fechamentos = deque(maxlen=max(self.janelas, default=1))
+        self.somas = {j: 0.0 for j in self.janelas}
+        self.diferenca_anterior = {}
+        self.cruzamento = {}
+        self.variacao = None
+        self.dia_preco = None
+        # Para desfazer o último candle quando chega uma versão atualizada do mesmo dia
+        self._descartado = None
+        self._diferenca_antes = {}
+
+        self.dia_sentimento = None
+        self.soma_sentimento = 0.0
+        self.noticias_dia = 0
+        self.negativas = deque()
+        self.ultima_noticia = None
+
+    # Janela nova depois do aquecimento: recalcula a soma com o que ainda estiver guardado.
+    # Se o histórico guardado for menor que a janela, ela só fica pronta depois de receber fechamentos suficientes
+    def garantir_janela(self, janela):
+        if janela in self.janelas:
+            return
+        self.janelas.add(janela)
+        if janela > self.fechamentos.maxlen:
+            self.fechamentos = deque(self.fechamentos, maxlen=janela)
+        self.somas[janela] = sum(list(self.fechamentos)[-janela:])
+        self.diferenca_anterior.pop(janela, None)
+        self._diferenca_antes.pop(janela, None)
+        self.cruzamento[janela] = None
+
+    # Retorna False se o candle for de um dia anterior ao último recebido (ignorado)
+    def novo_fechamento(self, dia, fechamento):
+        if self.dia_preco is not None and dia < self.dia_preco:
+            return False
+        if dia == self.dia_preco:
+            self._desfazer_ultimo()
+
+        anterior = self.fechamentos[-1] if self.fechamentos else None
+        self.variacao = (fechamento / anterior - 1.0) * 100 if anterior else None
+
+        for janela in self.janelas:
+            if len(self.fechamentos) >= janela:
+                self.somas[janela] -= self.fechamentos[-janela]
+        cheio = len(self.fechamentos) == self.fechamentos.maxlen
+        self._descartado = self.fechamentos[0] if cheio else None
+        self._diferenca_antes = dict(self.diferenca_anterior)
+        self.fechamentos.append(fechamento)
+
+        for janela in self.janelas:
+            self.somas[janela] += fechamento
+            # Média parcial não conta como média móvel: sem 'janela' fechamentos não há cruzamento
+            if len(self.fechamentos) < janela:
+                self.cruzamento[janela] = None
+                continue
+            diferenca = fechamento - self.somas[janela] / janela
+            previa = self.diferenca_anterior.get(janela)
+            if previa is not None and previa <= 0 < diferenca:
+                self.cruzamento[janela] = "alta"
+            elif previa is not None and previa >= 0 > diferenca:
+                self.cruzamento[janela] = "baixa"
+            else:
+                self.cruzamento[janela] = None
+            self.diferenca_anterior[janela] = diferenca
+
+        self.dia_preco = dia
+        return True
+
+    # Tira o último fechamento (mesmo dia chegando de novo): devolve o que saiu da fila e refaz as somas
+    def _desfazer_ultimo(self):
+        if not self.fechamentos:
+            return
+        self.fechamentos.pop()
+        if self._descartado is not None:
+            self.fechamentos.appendleft(self._descartado)
+            self._descartado = None
+        historico = list(self.fechamentos)
+        for janela in self.janelas:
+            self.somas[janela] = sum(historico[-janela:])
+        self.diferenca_anterior = {j: d for j, d in self._diferenca_antes.items() if j in self.janelas}
+
+    def nova_noticia(self, quando, intensidade, horas_rajada):
+        dia = quando.date()
+        # Notícia de um dia anterior chegando atrasada não zera o agregado do dia corrente
+        if self.dia_sentimento is None or dia > self.dia_sentimento:
+            self.dia_sentimento, self.soma_sentimento, self.noticias_dia = dia, 0.0, 0
+        if dia == self.dia_sentimento:
+            self.soma_sentimento += intensidade
+            self.noticias_dia += 1
+
+        if intensidade < LIMIAR_NEGATIVO:
+            # Mantém a fila ordenada mesmo com notícias fora de ordem
+            bisect.insort(self.negativas, quando)
+        self.ultima_noticia = max(quando, self.ultima_noticia) if self.ultima_noticia else quando
+        limite = self.ultima_noticia - timedelta(hours=horas_rajada)
+        while self.negativas and self.negativas[0] < limite:
+            self.negativas.popleft()
+
+
+# 🔹 Horários das notícias em uma só convenção: datetime sem fuso, no horário local (como datetime.now())
+def normalizar_momento(quando):
+    if quando is None:
+        return datetime.now()
+    quando = pd.Timestamp(quando).to_pydatetime()
+    if quando.tzinfo is not None:
+        quando = quando.astimezone().replace(tzinfo=None)
+    return quando
+
+
+# 🔹 Motor de alertas: cada evento só avalia as regras indexadas para aquele ticker e tipo de evento
+class MotorAlertas:
+    def __init__(self, regras=()):
+        self._indice = defaultdict(lambda: {"preco": [], "noticia": []})
+        self._estados = {}
+        self._janelas = defaultdict(set)
+        self._horas_rajada = 24
+        self._disparos = {}
+        for regra in regras:
+            self.adicionar_regra(regra)
+
+    def adicionar_regra(self, regra):
+        if regra.tipos & CONDICOES_PRECO:
+            self._indice[regra.ticker]["preco"].append(regra)
+        if regra.tipos & CONDICOES_NOTICIA:
+            self._indice[regra.ticker]["noticia"].append(regra)
+
+        self._janelas[regra.ticker] |= regra.janelas
+        for c in regra.condicoes:
+            if c["tipo"] == "rajada_negativa":
+                self._horas_rajada = max(self._horas_rajada, c.get("horas", 24))
+
+        estados = self._estados.values() if regra.ticker == TODOS else [self._estados.get(regra.ticker)]
+        for estado in estados:
+            if estado is not None:
+                for janela in regra.janelas:
+                    estado.garantir_janela(janela)
+
+    def _estado(self, ticker):
+        estado = self._estados.get(ticker)
+        if estado is None:
+            estado = _EstadoAtivo(self._janelas[ticker] | self._janelas[TODOS])
+            self._estados[ticker] = estado
+        return estado
+
+    # 🔹 Novo candle (diário) de um ativo; retorna os alertas disparados
+    def novo_candle(self, ticker, data, fechamento, avaliar=True):
+        estado = self._estado(ticker)
+        if not estado.novo_fechamento(pd.Timestamp(data).date(), float(fechamento)):
+            logging.warning(f"Candle de {ticker} em {data} ignorado: anterior ao último recebido ({estado.dia_preco}).")
+            return []
+        if not avaliar:
+            return []
+        return self._avaliar(ticker, estado, "preco")
+
+    # 🔹 Nova notícia já pontuada por analisar_sentimento_em_lote; retorna os alertas disparados
+    def nova_noticia(self, ticker, resultado, quando=None):
+        estado = self._estado(ticker)
+        quando = normalizar_momento(quando)
+        estado.nova_noticia(quando, float(resultado["intensidade"]), self._horas_rajada)
+        return self._avaliar(ticker, estado, "noticia")
+
+    # 🔹 Aquece o estado com o histórico de carregar_dados_preco sem disparar alertas
+    def carregar_historico(self, ticker, dados):
+        if dados.empty or "Close" not in dados.columns:
+            return
+        for data, fechamento in zip(dados["Date"], dados["Close"]):
+            self.novo_candle(ticker, data, fechamento, avaliar=False)
+
+    def _avaliar(self, ticker, estado, evento):
+        candidatas = []
+        for chave in (ticker, TODOS):
+            if chave in self._indice:
+                candidatas += self._indice[chave][evento]
+        if not candidatas:
+            return []
+
+        # Dia de referência: o mais recente entre o último candle e a última notícia
+        dia = max(d for d in (estado.dia_preco, estado.dia_sentimento) if d is not None)
+        alertas = []
+        for regra in candidatas:
+            chave = (regra.id, ticker)
+            # Cada regra dispara no máximo uma vez por ativo e por dia
+            if self._disparos.get(chave) == dia:
+                continue
+            if all(self._condicao(c, estado, dia) for c in regra.condicoes):
+                self._disparos[chave] = dia
+                alertas.append({
+                    "regra": regra.id,
+                    "ticker": ticker,
+                    "data": dia.isoformat(),
+                    "descricao": regra.descricao
+                })
+        return alertas
+
+    @staticmethod
+    def _condicao(condicao, estado, dia):
+        tipo = condicao["tipo"]
+        if tipo in CONDICOES_PRECO and estado.dia_preco != dia:
+            return False
+        if tipo == "cruzamento_media":
+            return estado.cruzamento.get(condicao.get("janela", 20)) == condicao.get("direcao", "alta")
+        if tipo == "variacao":
+            if estado.variacao is None:
+                return False
+            percentual = condicao["percentual"]
+            return estado.variacao <= percentual if percentual < 0 else estado.variacao >= percentual
+        if tipo == "sentimento_diario":
+            if estado.dia_sentimento != dia or estado.noticias_dia < condicao.get("minimo_noticias", 1):
+                return False
+            return estado.soma_sentimento / estado.noticias_dia < condicao["abaixo_de"]
+        if tipo == "rajada_negativa":
+            if not estado.negativas:
+                return False
+            # A janela termina na notícia mais recente recebida, não na última negativa
+            limite = estado.ultima_noticia - timedelta(hours=condicao.get("horas", 24))
+            recentes = sum(1 for quando in estado.negativas if quando >= limite)
+            return estado.dia_sentimento == dia and recentes >= condicao.get("quantidade", 3)
+        return False
+
+
+# 🔹 Carrega as regras de um JSON (lista de {"id", "ticker", "condicoes", "descricao"})
+def carregar_regras(caminho="data/alertas.json"):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [Regra(**r) for r in json.load(f)]
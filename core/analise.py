@@ -132,6 +132,8 @@ def analisar_sentimento_em_lote(noticias_relevantes, ativos_df, dicionario_geral
                 # Usa o texto original para manter a formatação, mas garante que o cálculo foi no texto limpo
                 "texto_original": f"{n['titulo']} {n['resumo']}",
                 "texto_traduzido": "Não aplicável",
+                # Data de publicação (quando a fonte informa), usada pelo motor de alertas
+                "data": n.get("data"),
                 "sentimento": sentimento_final_str,
                 "intensidade": pontuacao_final
             })
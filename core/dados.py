@@ -74,4 +74,17 @@ def extrair_palavras_chave(ativo):
         palavras_fixas = ["ações", "lucro", "balanço", "mercado", "investidores", "dividendos", "CVM", "B3"]
         return [str(c).strip() for c in campos + palavras_fixas if c]
     except Exception as e:
-        logging.critical(f"Erro na extração de palavra chave do ativo {ativo.get('ticker', 'N/A')}: {e}", exc_info=True)
\ No newline at end of file
+        logging.critical(f"Erro na extração de palavra chave do ativo {ativo.get('ticker', 'N/A')}: {e}", exc_info=True)
+
+# Aceita "PETR4" ou "PETR4.SA" e devolve o formato do DB/yfinance (índices como "^BVSP" passam direto)
+def normalizar_ticker(ticker):
+    ticker = ticker.strip().upper()
+    if "." not in ticker and not ticker.startswith("^"):
+        ticker = f"{ticker}.SA"
+    return ticker
+
+# Mantém só as notícias que citam alguma palavra-chave do ativo no título ou resumo
+def filtrar_noticias_relevantes(noticias, ativo):
+    palavras_chave = [p.lower() for p in extrair_palavras_chave(ativo)] if ativo else []
+    return [n for n in noticias if
+            any(p in f"{n['titulo']} {n['resumo']}".lower() for p in palavras_chave)]
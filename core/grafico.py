@@ -2,6 +2,7 @@ import altair as alt
 import streamlit as st
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import os, logging
 from logging.handlers import RotatingFileHandler
 
@@ -21,7 +22,7 @@ logging.basicConfig(
     ]
 )
 
-# 🔹 Mapeamento do periodo para a média móvel conforme boas praticas de mercado
+# 🔹 Mapeamento do periodo para a média móvel conforme boas praticas de mercado (janelas em pregões diários)
 def obter_janela_media(periodo):
     mapeamento_dias = {
         "5d": 3, "1mo": 10, "3mo": 20, "6mo": 30,
@@ -29,16 +30,46 @@ def obter_janela_media(periodo):
     }
     return mapeamento_dias.get(periodo, 20)
 
-# 🔹 Mapeia os periodos do grafico para dar um return de intervalo condicente com o periodo, não ficando muito pesado principalmente em periodos longos
+# 🔹 Largura de referência do gráfico (px) e orçamento de pontos: linha ~1 ponto por pixel, vela precisa de ~4px para ser legível.
+# O Streamlit estica o gráfico até a largura do container (use_container_width) e não informa essa largura ao Python,
+# então 700px é uma aproximação fixa; quem souber a largura real pode passá-la em plotar_grafico_*(dados, largura=...)
+LARGURA_GRAFICO = 700
+PIXELS_POR_VELA = 4
+# 🔹 Quantidade de pregões mais recentes que sempre ficam em resolução diária
+DIAS_RECENTES = 60
+
+# 🔹 Todos os períodos são buscados em barras diárias; o peso no gráfico é controlado por reduzir_pontos()
 def obter_intervalo(periodo):
-    if periodo in ["5d", "1mo", "3mo"]:
-        return "1d"
-    elif periodo in ["6mo", "1y"]:
-        return "1wk"
-    elif periodo in ["2y", "5y", "max"]:
-        return "1mo"
+    return "1d"
+
+# 🔹 Colunas do DataFrame vazio devolvido quando não há preço
+COLUNAS_PRECO_VAZIO = ["Date", "Close", "Média Móvel", "Open", "High", "Low", "Volume"]
+
+# 🔹 Trata o retorno do yfinance de um ticker (colunas, tipos, datas) e calcula a média móvel; None se não houver 'Close'
+def _tratar_dados_preco(dados, periodo):
+    # 🔹 Corrige nomes de coluna antes de qualquer verificação
+    if isinstance(dados.columns, pd.MultiIndex):
+        dados.columns = [col[0].strip() for col in dados.columns.values]
     else:
-        return "1d"
+        dados.columns = dados.columns.str.strip()
+
+    # 🔹 Verifica se os dados estão válidos
+    if dados.empty or "Close" not in dados.columns:
+        return None
+
+    # Reseta o índice e garante coerção de tipos para robustez
+    dados.reset_index(inplace=True)
+    colunas_preco = ["Open", "High", "Low", "Close", "Volume"]
+    for col in colunas_preco:
+        if col in dados.columns:
+            dados[col] = pd.to_numeric(dados[col], errors='coerce')
+    dados.dropna(subset=["Close"], inplace=True)
+    if 'Date' in dados.columns:
+        dados['Date'] = pd.to_datetime(dados['Date'])
+
+    janela = obter_janela_media(periodo)
+    dados["Média Móvel"] = dados["Close"].rolling(window=janela, min_periods=1).mean()
+    return dados
 
 # 🔹 Busca dados de preço no yfinance, trata os dados e calcula média móvel
 def carregar_dados_preco(ticker, periodo):
@@ -46,34 +77,126 @@ def carregar_dados_preco(ticker, periodo):
 
         intervalo = obter_intervalo(periodo)
         dados = yf.download(ticker, period=periodo, interval=intervalo, progress=False)
+        dados = _tratar_dados_preco(dados, periodo)
 
-        # 🔹 Corrige nomes de coluna antes de qualquer verificação
-        if isinstance(dados.columns, pd.MultiIndex):
-            dados.columns = [col[0].strip() for col in dados.columns.values]
-        else:
-            dados.columns = dados.columns.str.strip()
-
-        # 🔹 Verifica se os dados estão válidos
-        if not dados.empty and "Close" in dados.columns:
-            # Reseta o índice e garante coerção de tipos para robustez
-            dados.reset_index(inplace=True)
-            colunas_preco = ["Open", "High", "Low", "Close", "Volume"]
-            for col in colunas_preco:
-                if col in dados.columns:
-                    dados[col] = pd.to_numeric(dados[col], errors='coerce')
-            dados.dropna(subset=["Close"], inplace=True)
-            if 'Date' in dados.columns:
-                dados['Date'] = pd.to_datetime(dados['Date'])
-
-            janela = obter_janela_media(periodo)
-            dados["Média Móvel"] = dados["Close"].rolling(window=janela, min_periods=1).mean()
+        if dados is not None:
             return dados
         else:
             st.warning("⚠️ Dados vazios ou coluna 'Close' ausente.")
-            return pd.DataFrame(columns=["Date", "Close", "Média Móvel", "Open", "High", "Low", "Volume"])
+            return pd.DataFrame(columns=COLUNAS_PRECO_VAZIO)
     except Exception as e:
         st.error(f"❌ Erro ao buscar dados de preço: {e}")
-        return pd.DataFrame(columns=["Date", "Close", "Média Móvel", "Open", "High", "Low", "Volume"])
+        return pd.DataFrame(columns=COLUNAS_PRECO_VAZIO)
+
+# 🔹 Versão em lote: uma chamada do yfinance por lote de tickers (yf.download não é seguro entre threads,
+# então quem roda em paralelo deve buscar os preços antes). Retorna {ticker: DataFrame}; tickers sem dados ficam de fora
+def carregar_dados_preco_lote(tickers, periodo, tamanho_lote=50):
+    intervalo = obter_intervalo(periodo)
+    resultado = {}
+    for ini in range(0, len(tickers), tamanho_lote):
+        lote = list(tickers[ini:ini + tamanho_lote])
+        try:
+            dados = yf.download(lote, period=periodo, interval=intervalo, group_by="ticker",
+                                progress=False, threads=True)
+        except Exception as e:
+            logging.error(f"Erro ao buscar preços do lote {lote[0]}..{lote[-1]}: {e}", exc_info=True)
+            continue
+        if dados.empty:
+            continue
+
+        for ticker in lote:
+            if isinstance(dados.columns, pd.MultiIndex):
+                if ticker not in dados.columns.get_level_values(0):
+                    continue
+                tabela = dados[ticker].dropna(how="all").copy()
+            elif len(lote) == 1:
+                # Versões antigas do yfinance devolvem colunas simples quando o lote tem um ticker só
+                tabela = dados.copy()
+            else:
+                continue
+            tabela = _tratar_dados_preco(tabela, periodo)
+            if tabela is not None and not tabela.empty:
+                resultado[ticker] = tabela.reset_index(drop=True)
+    return resultado
+
+# 🔹 LTTB (Largest-Triangle-Three-Buckets): escolhe os índices que preservam o formato visual da série
+def _indices_lttb(x, y, n_pontos):
+    n = len(y)
+    if n_pontos >= n:
+        return np.arange(n)
+    if n_pontos < 3:
+        # LTTB precisa de primeiro + último + 1 balde; abaixo disso, pontos igualmente espaçados
+        return np.linspace(0, n - 1, max(n_pontos, 0)).astype(np.int64)
+
+    indices = np.empty(n_pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # n_pontos - 2 baldes entre o primeiro e o último ponto
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+
+    a = 0
+    for i in range(n_pontos - 2):
+        ini, fim = limites[i], limites[i + 1]
+        if i < n_pontos - 3:
+            prox_ini, prox_fim = limites[i + 1], limites[i + 2]
+        else:
+            prox_ini, prox_fim = n - 1, n
+        media_x = x[prox_ini:prox_fim].mean()
+        media_y = y[prox_ini:prox_fim].mean()
+
+        # Área do triângulo (ponto escolhido anterior, candidato, média do próximo balde)
+        areas = np.abs(
+            (x[a] - media_x) * (y[ini:fim] - y[a]) -
+            (x[a] - x[ini:fim]) * (media_y - y[a])
+        )
+        a = ini + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+# 🔹 Reduz a série de linha para n_pontos mantendo o formato (LTTB sobre o fechamento)
+def reduzir_lttb(dados, n_pontos):
+    if len(dados) <= n_pontos:
+        return dados
+    x = pd.to_datetime(dados["Date"]).to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    y = dados["Close"].to_numpy(dtype=float)
+    return dados.iloc[_indices_lttb(x, y, n_pontos)]
+
+# 🔹 Agrupa barras consecutivas em até n_baldes velas preservando OHLC (abertura do 1º, máxima, mínima, fechamento do último)
+def agregar_ohlc(dados, n_baldes):
+    n = len(dados)
+    if n <= n_baldes:
+        return dados
+
+    regras = {
+        "Date": "first", "Open": "first", "High": "max", "Low": "min",
+        "Close": "last", "Volume": "sum", "Média Móvel": "last"
+    }
+    regras = {col: func for col, func in regras.items() if col in dados.columns}
+    # Todas as velas cobrem o mesmo número de pregões, contados a partir do mais recente;
+    # se sobrar um balde incompleto, ele é o mais antigo
+    tamanho = -(-n // n_baldes)
+    baldes = -((n - 1 - np.arange(n)) // tamanho)
+    return dados.groupby(baldes, sort=True).agg(regras).reset_index(drop=True)
+
+# 🔹 Limita os pontos enviados ao gráfico conforme a largura, mantendo os pregões recentes em resolução diária
+def reduzir_pontos(dados, tipo="linha", largura=LARGURA_GRAFICO, dias_recentes=DIAS_RECENTES):
+    limite = largura if tipo == "linha" else max(largura // PIXELS_POR_VELA, 1)
+    if dados.empty or len(dados) <= limite:
+        return dados
+
+    # No máximo metade do orçamento fica com o trecho recente, o restante resume o histórico
+    n_recentes = min(dias_recentes, limite // 2)
+    antigos = dados.iloc[:len(dados) - n_recentes]
+    recentes = dados.iloc[len(dados) - n_recentes:]
+    orcamento = limite - n_recentes
+
+    if tipo == "linha":
+        antigos = reduzir_lttb(antigos, orcamento)
+    else:
+        antigos = agregar_ohlc(antigos, orcamento)
+
+    return pd.concat([antigos, recentes], ignore_index=True)
+
 
 # 🔹 Exibe métrica de preço atual e variação
 def exibir_metricas_preco(dados):
@@ -120,11 +243,12 @@ def formatar_balao(row):
 
 
 # 🔹 Gráfico de linha com média móvel (Com balão customizado e correção de renderização)
-def plotar_grafico_linha(dados):
+def plotar_grafico_linha(dados, largura=LARGURA_GRAFICO):
     if dados.empty:
         st.info("Dados de preço indisponíveis para plotar o gráfico de linha.")
         return
 
+    dados = reduzir_pontos(dados, "linha", largura).copy()
     dados["balão"] = dados.apply(formatar_balao, axis=1)
 
     # 🔹 Seleção invisível que segue o eixo X
@@ -181,17 +305,18 @@ def plotar_grafico_linha(dados):
 
     grafico_final = alt.layer(
         linha, media, linha_guia, fundo, texto, pontos_selecao
-    ).properties(width=700, height=400)  # Adicionando .interactive() de volta
+    ).properties(width=largura, height=400)  # Adicionando .interactive() de volta
 
     st.altair_chart(grafico_final, use_container_width=True)
 
 
 # 🔹 Gráfico de velas com média móvel (Restaurado com balão customizado)
-def plotar_grafico_velas(dados):
+def plotar_grafico_velas(dados, largura=LARGURA_GRAFICO):
     if dados.empty:
         st.info("Dados de preço indisponíveis para plotar o gráfico de velas.")
         return
 
+    dados = reduzir_pontos(dados, "velas", largura).copy()
     dados["balão"] = dados.apply(formatar_balao, axis=1)  # Usa a função corrigida
 
     # 🔹 Seleção invisível que segue o eixo X (Usando alt.selection_point)
@@ -260,7 +385,7 @@ def plotar_grafico_velas(dados):
 
     grafico_final = alt.layer(
         high_low, candle, media, linha_guia, fundo, texto, pontos_selecao
-    ).properties(width=700, height=400) #.interactive()
+    ).properties(width=largura, height=400) #.interactive()
 
     st.altair_chart(grafico_final, use_container_width=True)
 
@@ -0,0 +1,235 @@
+import argparse, importlib.util, json, logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from statistics import median
+import pandas as pd
+from logging.handlers import RotatingFileHandler
+from core.news import buscar_noticias_combinadas
+from core.dados import carregar_ativos, filtrar_noticias_relevantes, normalizar_ticker, carregar_keywords, carregar_keywords_setoriais
+from core.analise import analisar_sentimento_em_lote, analisar_tendencia
+from core.alertas import MotorAlertas, carregar_regras, normalizar_momento
+from core.grafico import COLUNAS_PRECO_VAZIO, carregar_dados_preco, carregar_dados_preco_lote
+
+
+#config do logging para salvar erros no arquivo .log
+os.makedirs("logs", exist_ok=True)
+
+# Configura rotação: 1 MB por arquivo, até 5 arquivos antigos
+handler = RotatingFileHandler("logs/bugs.log", maxBytes=1_000_000, backupCount=5)
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        handler,
+        logging.StreamHandler()
+    ]
+)
+
+PERIODOS = ("5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "max")
+FORMATOS = ("jsonl", "parquet")
+
+
+# 🔹 Fora do `streamlit run` as funções st.* viram no-op, mas avisam a cada chamada; silencia esses avisos
+def _silenciar_streamlit():
+    for nome in list(logging.root.manager.loggerDict):
+        if nome.startswith("streamlit"):
+            logging.getLogger(nome).setLevel(logging.ERROR)
+
+
+# 🔹 Métricas de preço do período (mesma conta de exibir_metricas_preco + retorno no período)
+def calcular_metricas_preco(dados):
+    if dados.empty or "Close" not in dados.columns:
+        return {}
+    preco_atual = float(dados["Close"].iloc[-1])
+    preco_anterior = float(dados["Close"].iloc[-2]) if len(dados) > 1 else preco_atual
+    preco_inicial = float(dados["Close"].iloc[0])
+    return {
+        "data": pd.Timestamp(dados["Date"].iloc[-1]).date().isoformat() if "Date" in dados.columns else None,
+        "preco_atual": preco_atual,
+        "variacao_pct": (preco_atual - preco_anterior) / preco_anterior * 100,
+        "retorno_periodo_pct": (preco_atual - preco_inicial) / preco_inicial * 100,
+        "media_movel": float(dados["Média Móvel"].iloc[-1]) if "Média Móvel" in dados.columns else None
+    }
+
+
+# 🔹 Mesmo fluxo do app.py para um ticker: preço, notícias, filtro por palavra-chave, sentimento e tendência
+# (dados: preços já carregados; se None, busca só deste ticker — não use None dentro de threads)
+def analisar_ativo(ticker, periodo="6mo", ativos_df=None, dicionario_geral=None, dicionario_setorial=None, sentimento=True, dados=None):
+    ativos_df = carregar_ativos() if ativos_df is None else ativos_df
+    resultado, noticias_relevantes = _preparar_ativo(ticker, periodo, ativos_df, sentimento, dados)
+    if sentimento:
+        _pontuar_noticias(resultado, noticias_relevantes, ativos_df, dicionario_geral, dicionario_setorial)
+    return resultado
+
+
+# 🔹 Parte de I/O (roda no pool): métricas de preço, busca de notícias e filtro por palavra-chave
+def _preparar_ativo(ticker, periodo, ativos_df, sentimento, dados):
+    linha = ativos_df[ativos_df["ticker"] == ticker]
+    ativo = linha.iloc[0].to_dict() if not linha.empty else None
+    nome = ativo["nome"] if ativo else ticker
+
+    dados = carregar_dados_preco(ticker, periodo) if dados is None else dados
+    resultado = {
+        "ticker": ticker,
+        "nome": nome,
+        "setor": ativo.get("SETOR") if ativo else None,
+        "periodo": periodo,
+        "tendencia": analisar_tendencia(dados),
+        **calcular_metricas_preco(dados)
+    }
+    if dados.empty:
+        resultado["erro"] = "sem dados de preço"
+
+    if not sentimento:
+        return resultado, []
+    return resultado, filtrar_noticias_relevantes(buscar_noticias_combinadas(nome), ativo)
+
+
+# 🔹 Parte de CPU: o modelo de sentimento (tokenizer e torch compartilhados) não é seguro entre threads,
+# então roda só na thread que consome os resultados. Completa o resultado e devolve as notícias pontuadas
+def _pontuar_noticias(resultado, noticias_relevantes, ativos_df, dicionario_geral, dicionario_setorial):
+    analises = []
+    if noticias_relevantes:
+        analises = analisar_sentimento_em_lote(noticias_relevantes, ativos_df, dicionario_geral or {}, dicionario_setorial or {})
+
+    pontuacoes_validas = [float(r["intensidade"]) for r in analises if r["intensidade"] != 0.0]
+    pontuacao_media = median(pontuacoes_validas) if pontuacoes_validas else 0.0
+    destaques = sorted(analises, key=lambda x: abs(x["intensidade"]), reverse=True)[:5]
+
+    resultado.update({
+        "noticias_relevantes": len(noticias_relevantes),
+        "sentimento_medio": pontuacao_media,
+        "sentimento": "Positivo" if pontuacao_media > 0.1 else "Negativo" if pontuacao_media < -0.1 else "Neutro",
+        "destaques": [
+            {"texto": r["texto_original"], "sentimento": r["sentimento"], "intensidade": float(r["intensidade"])}
+            for r in destaques
+        ]
+    })
+    return analises
+
+
+# 🔹 Repassa ao motor o histórico (sem disparar), o último candle e as notícias pontuadas do ticker; devolve os alertas
+def alimentar_motor(motor, ticker, dados, analises):
+    alertas = []
+    if not dados.empty:
+        motor.carregar_historico(ticker, dados.iloc[:-1])
+        alertas += motor.novo_candle(ticker, dados["Date"].iloc[-1], dados["Close"].iloc[-1])
+
+    def momento(r):
+        try:
+            return normalizar_momento(r["data"]) if r.get("data") else None
+        except (ValueError, TypeError):
+            return None
+
+    # Em ordem de publicação; notícias sem data entram por último, como "agora"
+    datadas = sorted(((momento(r), r) for r in analises), key=lambda par: (par[0] is None, par[0] or datetime.min))
+    for quando, r in datadas:
+        alertas += motor.nova_noticia(ticker, r, quando)
+    return alertas
+
+
+# 🔹 Analisa vários tickers com um pool limitado de threads; entrega cada resultado assim que fica pronto
+# (motor: MotorAlertas opcional, alimentado nesta thread conforme cada ticker termina; o resultado ganha a chave "alertas")
+def analisar_ativos(tickers, periodo="6mo", max_workers=4, sentimento=True, motor=None):
+    ativos_df = carregar_ativos()
+    try:
+        dicionario_geral = carregar_keywords()
+        dicionario_setorial = carregar_keywords_setoriais()
+    except Exception as e:
+        logging.error(f"Erro ao carregar arquivos JSON de dicionários: {e}", exc_info=True)
+        dicionario_geral, dicionario_setorial = {}, {}
+
+    # Preços buscados antes do pool, em lotes: yf.download usa estado global e não pode rodar em várias threads
+    precos = carregar_dados_preco_lote(list(tickers), periodo)
+    sem_preco = [t for t in tickers if t not in precos]
+    if sem_preco:
+        logging.warning(f"Sem dados de preço para {len(sem_preco)} ticker(s): {', '.join(sem_preco[:20])}")
+
+    # No pool fica só o I/O de notícias; o sentimento roda aqui, uma análise por vez, conforme cada ticker chega
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {
+            executor.submit(_preparar_ativo, ticker, periodo, ativos_df, sentimento,
+                            precos.get(ticker, pd.DataFrame(columns=COLUNAS_PRECO_VAZIO))): ticker
+            for ticker in tickers
+        }
+        for futuro in as_completed(futuros):
+            ticker = futuros[futuro]
+            try:
+                resultado, noticias_relevantes = futuro.result()
+                analises = []
+                if sentimento:
+                    analises = _pontuar_noticias(resultado, noticias_relevantes, ativos_df,
+                                                 dicionario_geral, dicionario_setorial)
+                if motor is not None:
+                    resultado["alertas"] = alimentar_motor(
+                        motor, ticker, precos.get(ticker, pd.DataFrame(columns=COLUNAS_PRECO_VAZIO)), analises)
+                yield resultado
+            except Exception as e:
+                logging.error(f"Erro na análise em lote de {ticker}: {e}", exc_info=True)
+                yield {"ticker": ticker, "periodo": periodo, "erro": str(e)}
+
+
+# 🔹 Grava os resultados: JSON Lines é escrito linha a linha; Parquet precisa de pyarrow ou fastparquet
+def salvar_resultados(resultados, destino, formato="jsonl"):
+    total = 0
+    if formato == "jsonl":
+        with open(destino, "w", encoding="utf-8") as f:
+            for r in resultados:
+                f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                total += 1
+        return total
+
+    tabela = pd.DataFrame(list(resultados))
+    if "destaques" in tabela.columns:
+        tabela["destaques"] = tabela["destaques"].apply(lambda d: json.dumps(d, ensure_ascii=False) if isinstance(d, list) else None)
+    tabela.to_parquet(destino, index=False)
+    return len(tabela)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.lote",
+        description="Análise em lote (sem Streamlit) de notícias, sentimento, tendência e preço dos ativos."
+    )
+    parser.add_argument("tickers", nargs="*", help="Tickers a analisar (ex.: PETR4 VALE3.SA)")
+    parser.add_argument("--todos", action="store_true", help="Analisa todos os ativos do banco de dados")
+    parser.add_argument("--periodo", default="6mo", choices=PERIODOS)
+    parser.add_argument("--workers", type=int, default=4, help="Número máximo de tickers analisados em paralelo")
+    parser.add_argument("--formato", default="jsonl", choices=FORMATOS)
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: resultados/analise_<data>.<formato>)")
+    parser.add_argument("--sem-sentimento", action="store_true", help="Pula a busca de notícias e o modelo de sentimento")
+    parser.add_argument("--alertas", metavar="REGRAS_JSON", help="Avalia as regras de alerta (ex.: data/alertas.json) sobre o último candle e as notícias de cada ticker")
+    args = parser.parse_args(argv)
+
+    _silenciar_streamlit()
+
+    if args.todos:
+        tickers = list(dict.fromkeys(carregar_ativos()["ticker"]))
+    else:
+        tickers = list(dict.fromkeys(normalizar_ticker(t) for t in args.tickers))
+    if not tickers:
+        parser.error("informe ao menos um ticker ou use --todos")
+
+    destino = args.saida
+    if not destino:
+        os.makedirs("resultados", exist_ok=True)
+        destino = os.path.join("resultados", f"analise_{datetime.now():%Y%m%d_%H%M}.{args.formato}")
+
+    # Falha antes de analisar o universo inteiro, não na hora de gravar
+    if args.formato == "parquet" and not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+        parser.error("o formato parquet requer pyarrow ou fastparquet instalado")
+
+    motor = MotorAlertas(carregar_regras(args.alertas)) if args.alertas else None
+    resultados = analisar_ativos(tickers, args.periodo, max(args.workers, 1), not args.sem_sentimento, motor)
+    total = salvar_resultados(resultados, destino, args.formato)
+
+    print(f"{total} ativos analisados -> {destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from logging.handlers import RotatingFileHandler
+
+
+#config do logging para salvar erros no arquivo .log
+os.makedirs("logs", exist_ok=True)
+
+# Configura rotação: 1 MB por arquivo, até 5 arquivos antigos
+handler = RotatingFileHandler("logs/bugs.log", maxBytes=1_000_000, backupCount=5)
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        handler,
+        logging.StreamHandler()
+    ]
+)
+
+# 🔹 Quantidade aproximada de pregões em cada período do app (None == histórico inteiro)
+PREGOES_POR_PERIODO = {
+    "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126,
+    "1y": 252, "2y": 504, "5y": 1260, "max": None
+}
+NIVEIS_SETORIAIS = {"SETOR": "setores", "SUBSETOR": "subsetores", "SEGMENTO": "segmentos"}
+BENCHMARK_PADRAO = "^BVSP"
+
+
+# 🔹 Códigos do nível setorial pedido e a lista de categorias correspondente
+def _codigos_nivel(painel, nivel):
+    codigos = {"SETOR": painel.codigo_setor, "SUBSETOR": painel.codigo_subsetor,
+               "SEGMENTO": painel.codigo_segmento}[nivel]
+    return np.asarray(codigos), getattr(painel, NIVEIS_SETORIAIS[nivel])
+
+
+# 🔹 Retornos diários simples do painel no período; NaN onde o ativo não negociou
+def _retornos(painel, colunas, periodo):
+    fechamento = painel.campo("Close")
+    pregoes = PREGOES_POR_PERIODO.get(periodo)
+    # Um pregão a mais para que o período tenha 'pregoes' retornos
+    inicio = max(len(painel.datas) - pregoes - 1, 0) if pregoes else 0
+    precos = np.asarray(fechamento[inicio:, colunas], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        retornos = precos[1:] / precos[:-1] - 1.0
+    retornos[~np.isfinite(retornos)] = np.nan
+    return retornos, painel.datas_pandas()[inicio + 1:]
+
+
+# 🔹 Matriz de correlação dos retornos usando só os dias em que os dois ativos negociaram (tudo em produtos de matrizes)
+@st.cache_data(max_entries=64)
+def calcular_correlacao(_painel, versao, tickers, periodo, min_observacoes=20):
+    colunas = _painel.indices(tickers)
+    nomes = [_painel.tickers[i] for i in colunas]
+    retornos, _ = _retornos(_painel, colunas, periodo)
+
+    validos = (~np.isnan(retornos)).astype(np.float64)
+    x = np.nan_to_num(retornos)
+
+    n = validos.T @ validos
+    soma = x.T @ validos                      # soma[i, j] = soma de x_i nos dias em que j também negociou
+    soma_quad = (x * x).T @ validos
+    produto = x.T @ x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = produto - soma * soma.T / n
+        var_i = soma_quad - soma ** 2 / n
+        var_j = soma_quad.T - soma.T ** 2 / n
+        correlacao = cov / np.sqrt(var_i * var_j)
+    correlacao[n < min_observacoes] = np.nan
+    np.fill_diagonal(correlacao, 1.0)
+
+    return pd.DataFrame(np.clip(correlacao, -1.0, 1.0), index=nomes, columns=nomes)
+
+
+# 🔹 Índices equal-weight por setor/subsetor/segmento (base 100), média dos retornos dos ativos que negociaram no dia
+@st.cache_data(max_entries=32)
+def calcular_indices_setoriais(_painel, versao, nivel="SETOR", periodo="1y", tickers=None):
+    codigos, categorias = _codigos_nivel(_painel, nivel)
+
+    colunas = _painel.indices(tickers) if tickers else np.arange(len(_painel.tickers))
+    retornos, datas = _retornos(_painel, colunas, periodo)
+
+    # Matriz de pertencimento ativo -> grupo
+    grupos = codigos[colunas]
+    pertence = np.zeros((len(colunas), len(categorias)), dtype=np.float64)
+    pertence[np.arange(len(colunas)), grupos] = 1.0
+
+    validos = ~np.isnan(retornos)
+    soma = np.nan_to_num(retornos) @ pertence
+    quantidade = validos.astype(np.float64) @ pertence
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = np.where(quantidade > 0, soma / quantidade, 0.0)
+
+    indices = 100.0 * np.cumprod(1.0 + media, axis=0)
+    tabela = pd.DataFrame(indices, index=datas, columns=categorias)
+    # Remove grupos sem nenhum ativo no recorte (ex.: "Índice" quando só ações foram pedidas)
+    return tabela.loc[:, quantidade.sum(axis=0) > 0]
+
+
+# 🔹 Beta móvel de cada ativo contra o benchmark: cov(ativo, bench) / var(bench) na janela, em somas acumuladas
+@st.cache_data(max_entries=32)
+def calcular_beta_movel(_painel, versao, tickers, periodo="1y", janela=60, benchmark=BENCHMARK_PADRAO):
+    if benchmark not in _painel.tickers:
+        logging.warning(f"Benchmark {benchmark} ausente do painel de preços.")
+        return pd.DataFrame()
+
+    colunas = _painel.indices(tickers)
+    nomes = [_painel.tickers[i] for i in colunas]
+    retornos, datas = _retornos(_painel, np.append(colunas, _painel.indice(benchmark)), periodo)
+    x, b = retornos[:, :-1], retornos[:, -1:]
+
+    # Só entram na janela os dias em que ativo e benchmark negociaram
+    par = ~(np.isnan(x) | np.isnan(b))
+    x, b = np.where(par, x, 0.0), np.where(par, b, 0.0)
+
+    def janela_movel(valores):
+        acumulado = np.cumsum(np.vstack([np.zeros((1, valores.shape[1])), valores]), axis=0)
+        return acumulado[janela:] - acumulado[:-janela]
+
+    n = janela_movel(par.astype(np.float64))
+    soma_x, soma_b = janela_movel(x), janela_movel(b)
+    soma_xb, soma_bb = janela_movel(x * b), janela_movel(b * b)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = soma_xb / n - soma_x * soma_b / n ** 2
+        var = soma_bb / n - (soma_b / n) ** 2
+        beta = cov / var
+    beta[(n < janela // 2) | ~np.isfinite(beta)] = np.nan
+
+    return pd.DataFrame(beta, index=datas[janela - 1:], columns=nomes)
+
+
+# 🔹 Tickers de um setor (ou subsetor/segmento) presentes no painel
+def tickers_do_grupo(painel, nome, nivel="SETOR"):
+    codigos, categorias = _codigos_nivel(painel, nivel)
+    if nome not in categorias:
+        return ()
+    posicoes = np.flatnonzero(codigos == categorias.index(nome))
+    return tuple(painel.tickers[i] for i in posicoes)
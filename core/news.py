@@ -42,7 +42,7 @@ def buscar_noticias_news(termo):
 
         # Extrai título e resumo dos artigos retornados
         return [
-            {"titulo": artigo["title"], "resumo": artigo.get("description", "")}
+            {"titulo": artigo["title"], "resumo": artigo.get("description", ""), "data": artigo.get("publishedAt")}
             for artigo in dados.get("articles", [])
             if artigo.get("title")
         ]
@@ -80,7 +80,8 @@ def buscar_noticias_currents(termo):
                 "titulo": n["title"],
                 "resumo": n.get("description", ""),
                 "fonte": n.get("source", ""),
-                "url": n["url"]
+                "url": n["url"],
+                "data": n.get("published")
             }
             for n in dados.get("news", [])
         ]
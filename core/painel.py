@@ -0,0 +1,252 @@
+import json, logging
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from logging.handlers import RotatingFileHandler
+
+
+#config do logging para salvar erros no arquivo .log
+os.makedirs("logs", exist_ok=True)
+
+# Configura rotação: 1 MB por arquivo, até 5 arquivos antigos
+handler = RotatingFileHandler("logs/bugs.log", maxBytes=1_000_000, backupCount=5)
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        handler,
+        logging.StreamHandler()
+    ]
+)
+
+DIRETORIO_PAINEL = "data/painel"
+CAMPOS = ("Open", "High", "Low", "Close", "Volume")
+# Índices de referência baixados junto com os ativos (ex.: benchmark para beta)
+EXTRAS_PADRAO = ("^BVSP",)
+SETOR_EXTRAS = "Índice"
+
+
+# 🔹 Painel denso e alinhado de preços de todo o universo de ativos
+@dataclass
+class PainelPrecos:
+    """
+    Preços OHLCV ajustados de vários ativos em arrays float32 alinhados por data.
+
+    precos tem formato (campo, data, ativo) na ordem de CAMPOS; dias sem negociação ficam NaN.
+    datas é int32 em dias desde 1970-01-01. O código de ticker é a posição da coluna em tickers;
+    setor/subsetor/segmento são códigos int16 que indexam as respectivas listas de categorias.
+    Quando carregado com mmap, os arrays são somente leitura e compartilhados entre processos
+    pelo cache de páginas do sistema operacional (cada worker chama carregar_painel).
+    """
+    datas: np.ndarray
+    precos: np.ndarray
+    tickers: list
+    codigos: np.ndarray
+    setores: list
+    subsetores: list
+    segmentos: list
+    versao: str = ""
+
+    @property
+    def codigo_setor(self):
+        return self.codigos[0]
+
+    @property
+    def codigo_subsetor(self):
+        return self.codigos[1]
+
+    @property
+    def codigo_segmento(self):
+        return self.codigos[2]
+
+    @property
+    def nbytes(self):
+        return self.datas.nbytes + self.precos.nbytes + self.codigos.nbytes
+
+    def campo(self, nome):
+        return self.precos[CAMPOS.index(nome)]
+
+    def indice(self, ticker):
+        return self.tickers.index(ticker)
+
+    def indices(self, tickers):
+        posicoes = {t: i for i, t in enumerate(self.tickers)}
+        return np.array([posicoes[t] for t in tickers if t in posicoes], dtype=np.int64)
+
+    def datas_pandas(self):
+        return pd.to_datetime(self.datas.astype("datetime64[D]"))
+
+    # 🔹 Série de um ticker no mesmo formato de carregar_dados_preco (sem a média móvel)
+    def serie(self, ticker):
+        i = self.indice(ticker)
+        dados = pd.DataFrame({campo: self.precos[j, :, i] for j, campo in enumerate(CAMPOS)})
+        dados.insert(0, "Date", self.datas_pandas())
+        return dados.dropna(subset=["Close"]).reset_index(drop=True)
+
+
+# 🔹 Converte uma coluna de texto em códigos int16 + lista de categorias
+def _codificar(valores):
+    categorias = pd.Categorical(pd.Series(valores).fillna("").astype(str))
+    return categorias.codes.astype(np.int16), [str(c) for c in categorias.categories]
+
+
+# 🔹 Baixa os preços diários do universo em lotes no yfinance e monta o painel alinhado
+def montar_painel(ativos_df, periodo="max", extras=EXTRAS_PADRAO, tamanho_lote=50):
+    # O cadastro pode repetir tickers; mantém a primeira ocorrência
+    universo = list(dict.fromkeys(list(ativos_df["ticker"]) + list(extras)))
+
+    por_campo = {campo: [] for campo in CAMPOS}
+    for ini in range(0, len(universo), tamanho_lote):
+        lote = universo[ini:ini + tamanho_lote]
+        try:
+            # Preços ajustados (desdobramentos, bonificações e proventos), como em carregar_dados_preco;
+            # sem ajuste cada evento corporativo vira um retorno falso nas análises de core.mercado
+            dados = yf.download(lote, period=periodo, interval="1d", group_by="column",
+                                auto_adjust=True, progress=False, threads=True)
+        except Exception as e:
+            logging.error(f"Erro ao baixar lote de preços {lote[0]}..{lote[-1]}: {e}", exc_info=True)
+            continue
+        if dados.empty:
+            continue
+        for campo in CAMPOS:
+            if campo in dados.columns.get_level_values(0):
+                tabela = dados[campo]
+                por_campo[campo].append(tabela.to_frame(lote[0]) if isinstance(tabela, pd.Series) else tabela)
+
+    if not por_campo["Close"]:
+        logging.warning("Nenhum preço retornado ao montar o painel.")
+        return None
+
+    fechamento = pd.concat(por_campo["Close"], axis=1)
+    fechamento = fechamento.loc[:, ~fechamento.columns.duplicated()]
+    tickers = [t for t in universo if t in fechamento.columns and fechamento[t].notna().any()]
+    datas = pd.DatetimeIndex(fechamento.index).tz_localize(None).normalize()
+
+    precos = np.full((len(CAMPOS), len(datas), len(tickers)), np.nan, dtype=np.float32)
+    for j, campo in enumerate(CAMPOS):
+        if not por_campo[campo]:
+            continue
+        tabela = pd.concat(por_campo[campo], axis=1)
+        tabela = tabela.loc[:, ~tabela.columns.duplicated()]
+        tabela.index = pd.DatetimeIndex(tabela.index).tz_localize(None).normalize()
+        tabela = tabela.reindex(index=datas, columns=tickers)
+        precos[j] = tabela.to_numpy(dtype=np.float32, na_value=np.nan)
+
+    info = ativos_df.drop_duplicates("ticker").set_index("ticker").reindex(tickers)
+    codigos = np.empty((3, len(tickers)), dtype=np.int16)
+    categorias = []
+    for k, coluna in enumerate(["SETOR", "SUBSETOR", "SEGMENTO"]):
+        codigos[k], cats = _codificar(info[coluna].fillna(SETOR_EXTRAS))
+        categorias.append(cats)
+
+    dias = datas.to_numpy(dtype="datetime64[D]").astype(np.int32)
+    return PainelPrecos(
+        datas=dias,
+        precos=precos,
+        tickers=tickers,
+        codigos=codigos,
+        setores=categorias[0],
+        subsetores=categorias[1],
+        segmentos=categorias[2],
+        versao=datetime.now().isoformat(timespec="seconds")
+    )
+
+
+# 🔹 Grava o painel numa pasta nova por versão e só então troca o ponteiro ATUAL (os.replace é atômico),
+# assim um leitor nunca combina precos.npy de uma versão com meta.json de outra
+def salvar_painel(painel, diretorio=DIRETORIO_PAINEL, versoes_mantidas=2):
+    os.makedirs(diretorio, exist_ok=True)
+
+    nome_versao = painel.versao.replace("-", "").replace(":", "").replace("T", "_") or datetime.now().strftime("%Y%m%d_%H%M%S")
+    pasta = os.path.join(diretorio, nome_versao)
+    sufixo = 1
+    while os.path.exists(pasta):
+        pasta = os.path.join(diretorio, f"{nome_versao}_{sufixo}")
+        sufixo += 1
+    os.makedirs(pasta)
+
+    np.save(os.path.join(pasta, "datas.npy"), np.ascontiguousarray(painel.datas))
+    np.save(os.path.join(pasta, "precos.npy"), np.ascontiguousarray(painel.precos))
+    np.save(os.path.join(pasta, "codigos.npy"), np.ascontiguousarray(painel.codigos))
+    meta = {
+        "versao": painel.versao,
+        "campos": list(CAMPOS),
+        "tickers": painel.tickers,
+        "setores": painel.setores,
+        "subsetores": painel.subsetores,
+        "segmentos": painel.segmentos
+    }
+    with open(os.path.join(pasta, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    temporario = os.path.join(diretorio, "ATUAL.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(pasta))
+    os.replace(temporario, os.path.join(diretorio, "ATUAL"))
+
+    _limpar_versoes_antigas(diretorio, versoes_mantidas)
+
+
+# 🔹 Remove versões antigas; a anterior fica para quem ainda está com ela aberta
+def _limpar_versoes_antigas(diretorio, versoes_mantidas):
+    pastas = sorted(
+        (os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+         if os.path.isdir(os.path.join(diretorio, nome))),
+        key=os.path.getmtime
+    )
+    for pasta in pastas[:-versoes_mantidas]:
+        try:
+            shutil.rmtree(pasta)
+        except OSError as e:
+            # No Windows a pasta pode estar mapeada por outro processo; tenta de novo na próxima gravação
+            logging.warning(f"Não foi possível remover a versão antiga do painel {pasta}: {e}")
+
+
+# 🔹 Abre a versão apontada por ATUAL; com mmap=True nada é copiado para a memória do processo até ser lido
+def carregar_painel(diretorio=DIRETORIO_PAINEL, mmap=True):
+    try:
+        with open(os.path.join(diretorio, "ATUAL"), "r", encoding="utf-8") as f:
+            pasta = os.path.join(diretorio, f.read().strip())
+        with open(os.path.join(pasta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        modo = "r" if mmap else None
+        painel = PainelPrecos(
+            datas=np.load(os.path.join(pasta, "datas.npy"), mmap_mode=modo),
+            precos=np.load(os.path.join(pasta, "precos.npy"), mmap_mode=modo),
+            tickers=meta["tickers"],
+            codigos=np.load(os.path.join(pasta, "codigos.npy"), mmap_mode=modo),
+            setores=meta["setores"],
+            subsetores=meta["subsetores"],
+            segmentos=meta["segmentos"],
+            versao=meta.get("versao", "")
+        )
+    except FileNotFoundError:
+        logging.warning(f"Painel de preços não encontrado em {diretorio}.")
+        return None
+    except Exception as e:
+        logging.error(f"Erro ao carregar o painel de preços: {e}", exc_info=True)
+        return None
+
+    # Conferência extra: arrays e meta.json precisam descrever o mesmo painel
+    formato_esperado = (len(CAMPOS), len(painel.datas), len(painel.tickers))
+    if painel.precos.shape != formato_esperado or painel.codigos.shape != (3, len(painel.tickers)):
+        logging.error(f"Painel de preços inconsistente em {pasta}: precos {painel.precos.shape}, esperado {formato_esperado}.")
+        return None
+    return painel
+
+
+# 🔹 Permite atualizar o painel fora do Streamlit: python -m core.painel
+if __name__ == "__main__":
+    import sqlite3
+
+    with sqlite3.connect("data/ativos.db") as conn:
+        ativos = pd.read_sql("SELECT * FROM ativos", conn)
+    painel = montar_painel(ativos)
+    if painel is not None:
+        salvar_painel(painel)
+        print(f"Painel salvo: {len(painel.datas)} datas x {len(painel.tickers)} ativos, {painel.nbytes / 1e6:.1f} MB")
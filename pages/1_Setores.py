@@ -0,0 +1,78 @@
+import altair as alt
+import streamlit as st
+from core.dados import carregar_ativos
+from core.painel import carregar_painel, montar_painel, salvar_painel
+from core.mercado import (
+    calcular_correlacao,
+    calcular_indices_setoriais,
+    tickers_do_grupo
+)
+
+st.set_page_config(page_title="Radar Financeiro - Setores", layout="wide")
+st.title("🧭 Correlação por Setor")
+st.write("Correlação dos retornos diários entre os ativos de um setor e índices equal-weight dos subsetores, calculados sobre o painel de preços local.")
+
+
+# 🔹 Painel mapeado em memória, aberto uma vez por servidor
+@st.cache_resource
+def obter_painel():
+    return carregar_painel()
+
+
+painel = obter_painel()
+
+if painel is None:
+    st.warning("Painel de preços local não encontrado. Baixe os preços do universo para habilitar esta página.")
+    if st.button("⬇️ Baixar preços"):
+        with st.spinner("Baixando preços de todos os ativos..."):
+            novo = montar_painel(carregar_ativos())
+        if novo is not None:
+            salvar_painel(novo)
+            obter_painel.clear()
+            st.rerun()
+        else:
+            st.error("Não foi possível montar o painel de preços.")
+    st.stop()
+
+with st.sidebar:
+    st.header("Seleção")
+    setor = st.selectbox("Setor", sorted(s for s in painel.setores if s != "Índice"))
+    periodo = st.radio("📅 Período", ("1mo", "3mo", "6mo", "1y", "2y", "5y", "max"),
+        index=3,
+        horizontal=True
+    )
+    st.caption(f"Painel atualizado em {painel.versao}")
+
+tickers = tickers_do_grupo(painel, setor)
+if len(tickers) < 2:
+    st.info("O setor precisa de pelo menos dois ativos com preço para calcular correlação.")
+    st.stop()
+
+correlacao = calcular_correlacao(painel, painel.versao, tickers, periodo)
+
+# 🔹 Heatmap em formato longo (um retângulo por par de ativos)
+tabela = correlacao.rename_axis("Ativo").reset_index().melt(id_vars="Ativo", var_name="Par", value_name="Correlação")
+tabela["Ativo"] = tabela["Ativo"].str.replace(".SA", "", regex=False)
+tabela["Par"] = tabela["Par"].str.replace(".SA", "", regex=False)
+
+heatmap = alt.Chart(tabela).mark_rect().encode(
+    x=alt.X("Ativo:N", title=None, sort=None),
+    y=alt.Y("Par:N", title=None, sort=None),
+    color=alt.Color("Correlação:Q", scale=alt.Scale(scheme="redblue", domain=[-1, 1], reverse=True)),
+    tooltip=["Ativo:N", "Par:N", alt.Tooltip("Correlação:Q", format=".2f")]
+).properties(height=max(20 * len(tickers), 300))
+
+st.subheader(f"🔥 Correlação dos retornos — {setor}")
+st.altair_chart(heatmap, use_container_width=True)
+
+# 🔹 Índices dos subsetores do setor escolhido
+indices = calcular_indices_setoriais(painel, painel.versao, "SUBSETOR", periodo, tickers)
+if not indices.empty:
+    st.subheader("📈 Índices equal-weight dos subsetores (base 100)")
+    linhas = indices.rename_axis("Date").reset_index().melt(id_vars="Date", var_name="Subsetor", value_name="Índice")
+    grafico = alt.Chart(linhas).mark_line().encode(
+        x=alt.X("Date:T", title="Data"),
+        y=alt.Y("Índice:Q", title="Índice"),
+        color="Subsetor:N"
+    ).properties(height=350)
+    st.altair_chart(grafico, use_container_width=True)